@@ -77,7 +77,7 @@ def truncate_to_token_limit(text, max_tokens=3000, model=MODEL_NAME):
     
     # Add a note about truncation
     truncated_text = encoding.decode(truncated)
-    logging.info("Truncated text: %s", truncated_text)
+    logger.debug("Truncated text: %s", truncated_text)
     return truncated_text + "\n\n[Note: Email was truncated due to length.]"
 
 # =====================
@@ -435,7 +435,7 @@ def orchestrate_email_response():
                 if not is_meeting_correct:
                     # Invert the meeting request decision if human disagrees
                     is_meeting_request = "yes" if is_meeting_request not in ["yes", "true", "1"] else "no"
-                    logger.info(f"Human corrected meeting request decision to: {is_meeting_request}")
+                    logger.info("Human corrected meeting request decision to: %s", is_meeting_request)
                 
                 if is_meeting_request in ["yes", "true", "1"]:
                     # Apply the SCHEDULE label to the email
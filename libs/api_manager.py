@@ -1,15 +1,19 @@
 import os
 import json
 import logging
+from functools import lru_cache
 from pathlib import Path
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
+@lru_cache(maxsize=1)
 def load_api_keys():
     """
     Load API keys from configuration file.
     Looks for config/api_keys.json in the project root directory.
+    The file is read once per process; later calls return the cached dict,
+    so callers must not mutate it.
     
     Returns:
         dict: Dictionary containing all API keys
@@ -30,15 +34,24 @@ def load_api_keys():
         logger.error("Invalid JSON in api_keys.json")
         raise
 
+def _export_openai_key(keys):
+    """
+    Set OPENAI_API_KEY from an already-loaded key set.
+    
+    Returns:
+        bool: True if the key was present and exported
+    """
+    if "openai_api_key" not in keys:
+        return False
+    os.environ["OPENAI_API_KEY"] = keys["openai_api_key"]
+    logger.info("OpenAI API key loaded successfully")
+    return True
+
 def setup_openai_api():
     """
     Load OpenAI API key and set it as an environment variable.
     """
-    keys = load_api_keys()
-    if "openai_api_key" in keys:
-        os.environ["OPENAI_API_KEY"] = keys["openai_api_key"]
-        logger.info("OpenAI API key loaded successfully")
-    else:
+    if not _export_openai_key(load_api_keys()):
         logger.error("OpenAI API key not found in config/api_keys.json")
         raise KeyError("OpenAI API key not found in config")
 
@@ -63,10 +76,7 @@ def setup_all_apis():
     keys = load_api_keys()
     
     # Set up OpenAI API
-    if "openai_api_key" in keys:
-        os.environ["OPENAI_API_KEY"] = keys["openai_api_key"]
-        logger.info("OpenAI API key loaded successfully")
-    else:
+    if not _export_openai_key(keys):
         logger.warning("OpenAI API key not found in config")
     
     # Add other API setups here as needed
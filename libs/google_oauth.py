@@ -1,85 +1,217 @@
 import os
 import pickle
 import json
+import threading
+from contextlib import contextmanager
+try:
+    import fcntl
+except ImportError:  # Windows has no fcntl; fall back to the in-process lock only
+    fcntl = None
 from google_auth_oauthlib.flow import InstalledAppFlow
 from google.auth.transport.requests import Request
+from google.oauth2.credentials import Credentials
 from google.auth.exceptions import RefreshError
+from googleapiclient.discovery import build
 import logging
 from libs.api_manager import get_google_api_config
 
-logging.basicConfig(level=logging.INFO)
+# Configure logging
+logger = logging.getLogger(__name__)
 
 # Define the required OAuth scopes. For modifying Gmail (e.g., archiving), we need gmail.modify.
 SCOPES = ['https://www.googleapis.com/auth/gmail.modify']
 
+# In-process cache of the last credentials handed out, tied to token.json's mtime
+_cached_creds = None
+_cached_mtime = None
+_cache_lock = threading.Lock()
+
+# OAuth flow built from the client config, reused if authorization has to be retried
+_flow = None
+
+# Process-wide Gmail client so every caller shares one keep-alive HTTP connection,
+# and the credentials object it was built with
+_gmail_service = None
+_gmail_service_creds = None
+
 def get_gmail_credentials():
     """
     Authenticates with the Gmail API using OAuth and returns valid credentials.
-    Uses a token.pickle file to store/reuse access tokens, and logs errors for troubleshooting.
+    Uses a token.json file to store/reuse access tokens, and logs errors for troubleshooting.
+    A token.pickle left by older versions is converted to token.json on first load.
+
+    Credentials are cached in-process and reused while they are still valid and
+    token.json has not been rewritten since they were loaded. Loading and refreshing
+    run under a thread lock and a file lock, so concurrent callers trigger one refresh.
     """
-    creds = None
-    # Store token.pickle in the config directory instead of root
+    global _cached_creds, _cached_mtime
     config_dir = os.path.join(os.path.dirname(__file__), '..', 'config')
-    token_file = os.path.join(config_dir, 'token.pickle')
+    token_file = os.path.join(config_dir, 'token.json')
+
+    with _cache_lock:
+        if _cached_creds is not None and _cached_creds.valid and _token_mtime(token_file) == _cached_mtime:
+            return _cached_creds
+
+        # Serialize with other processes so only one of them refreshes an expired token;
+        # the others block here and then load the token.json the winner saved.
+        with _token_file_lock(config_dir):
+            creds = _load_or_authorize(config_dir, token_file)
+        _cached_creds = creds
+        _cached_mtime = _token_mtime(token_file)
+        return creds
+
+def _token_mtime(token_file):
+    """
+    Return the modification time of the token file, or None if it does not exist.
+    """
+    try:
+        return os.stat(token_file).st_mtime
+    except FileNotFoundError:
+        return None
+
+@contextmanager
+def _token_file_lock(config_dir):
+    """
+    Hold an exclusive lock on config/token.lock for the duration of the block.
+    """
+    if fcntl is None:
+        yield
+        return
+    os.makedirs(config_dir, exist_ok=True)
+    with open(os.path.join(config_dir, 'token.lock'), 'w') as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+def _load_or_authorize(config_dir, token_file):
+    """
+    Load credentials from disk, refreshing or re-running the OAuth flow as needed.
+    """
+    creds = None
+    migrated = False
+    legacy_token_file = os.path.join(config_dir, 'token.pickle')
     
     # Ensure config directory exists
-    if not os.path.exists(config_dir):
-        os.makedirs(config_dir)
-        logging.info(f"Created config directory at {config_dir}")
+    os.makedirs(config_dir, exist_ok=True)
     
-    # Try to load the token file if it exists
-    if os.path.exists(token_file):
-        try:
-            with open(token_file, 'rb') as token:
-                creds = pickle.load(token)
-            logging.info("Token file loaded successfully.")
-        except Exception as e:
-            logging.error(f"Error loading token file: {e}")
-            creds = None
-    else:
-        logging.info("Token file not found; starting new authentication.")
+    # Try to load the token file, falling back to a legacy token.pickle
+    try:
+        with open(token_file, 'r') as token:
+            creds = Credentials.from_authorized_user_info(json.load(token), SCOPES)
+        logger.info("Token file loaded successfully.")
+    except FileNotFoundError:
+        creds = _load_legacy_credentials(legacy_token_file)
+        migrated = creds is not None
+    except Exception as e:
+        logger.error("Error loading token file: %s", e)
+        creds = None
 
     # If no valid credentials, initiate the OAuth flow
     if not creds or not creds.valid:
         if creds and creds.expired and creds.refresh_token:
             try:
                 creds.refresh(Request())
-                logging.info("Credentials refreshed successfully.")
+                logger.info("Credentials refreshed successfully.")
             except RefreshError as re:
-                logging.error(f"RefreshError: {re}. Token may have been revoked or expired.")
+                logger.error("RefreshError: %s. Token may have been revoked or expired.", re)
                 creds = None  # Force reauthentication
+                _reset_flow()  # Start the new authorization from a clean session
             except Exception as e:
-                logging.error(f"An error occurred during credentials refresh: {e}")
+                logger.error("An error occurred during credentials refresh: %s", e)
                 creds = None
         
         if not creds:
             try:
-                # Get Google API config from our centralized API manager
-                google_config = get_google_api_config()
-                
-                # Create a temporary credentials.json file for the OAuth flow
-                temp_credentials_file = os.path.join(config_dir, 'temp_credentials.json')
-                with open(temp_credentials_file, 'w') as f:
-                    json.dump(google_config, f)
-                
-                flow = InstalledAppFlow.from_client_secrets_file(temp_credentials_file, SCOPES)
-                # Using a fixed port for consistency with your authorized redirect URI.
-                creds = flow.run_local_server(port=8080)
-                logging.info("New credentials obtained through OAuth flow.")
-                
-                # Clean up the temporary file
-                os.remove(temp_credentials_file)
+                flow = _get_flow()
+                try:
+                    # Using a fixed port for consistency with your authorized redirect URI.
+                    creds = flow.run_local_server(port=8080)
+                finally:
+                    # PKCE (RFC 7636) needs a fresh code verifier per authorization request;
+                    # the flow only generates one while code_verifier is None.
+                    flow.code_verifier = None
+                logger.info("New credentials obtained through OAuth flow.")
                 
             except Exception as e:
-                logging.error(f"OAuth flow failed: {e}")
+                logger.error("OAuth flow failed: %s", e)
                 raise e  # Reraise after logging
         
         # Save the new credentials for future runs
-        try:
-            with open(token_file, 'wb') as token:
-                pickle.dump(creds, token)
-            logging.info("New token file saved successfully.")
-        except Exception as e:
-            logging.error(f"Failed to save token file: {e}")
+        saved = _save_credentials(creds, token_file)
+    elif migrated:
+        # Rewrite still-valid legacy credentials in the JSON format
+        saved = _save_credentials(creds, token_file)
+    else:
+        saved = False
+
+    if migrated and saved:
+        os.remove(legacy_token_file)
+        logger.info("Removed legacy token.pickle after migration.")
     
-    return creds
\ No newline at end of file
+    return creds
+
+def _get_flow():
+    """
+    Return the OAuth flow for this process, building it from the client config on first use.
+    """
+    global _flow
+    if _flow is None:
+        # Build the flow straight from the in-memory client config
+        _flow = InstalledAppFlow.from_client_config(get_google_api_config(), SCOPES)
+    return _flow
+
+def _reset_flow():
+    """
+    Drop the cached OAuth flow so the next authorization builds a fresh one.
+    """
+    global _flow
+    _flow = None
+
+def _load_legacy_credentials(legacy_token_file):
+    """
+    Load credentials from a token.pickle written by older versions, or None if absent.
+    """
+    try:
+        with open(legacy_token_file, 'rb') as token:
+            creds = pickle.load(token)
+        logger.info("Legacy token.pickle loaded; it will be converted to token.json.")
+        return creds
+    except FileNotFoundError:
+        logger.info("Token file not found; starting new authentication.")
+    except Exception as e:
+        logger.error("Error loading legacy token file: %s", e)
+    return None
+
+def _save_credentials(creds, token_file):
+    """
+    Save credentials as JSON so later runs can reload them without pickle.
+    Returns True if the file was written.
+    """
+    try:
+        with open(token_file, 'w') as token:
+            token.write(creds.to_json())
+        logger.info("New token file saved successfully.")
+        return True
+    except Exception as e:
+        logger.error("Failed to save token file: %s", e)
+        return False
+
+def get_gmail_service():
+    """
+    Returns a Gmail API client shared across the process.
+    The client's authorized HTTP transport keeps its connection alive and refreshes
+    the credentials itself, so building it once avoids a new TLS handshake per caller.
+    The client is rebuilt whenever get_gmail_credentials() hands out a different
+    credentials object, e.g. after re-authorization or token.json being rewritten.
+
+    The client is not thread-safe: it uses an httplib2 transport, so share it only
+    between calls made from the same thread.
+    """
+    global _gmail_service, _gmail_service_creds
+    creds = get_gmail_credentials()
+    if _gmail_service is None or creds is not _gmail_service_creds:
+        _gmail_service = build('gmail', 'v1', credentials=creds)
+        _gmail_service_creds = creds
+    return _gmail_service
@@ -0,0 +1,45 @@
+import threading
+import time
+import logging
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+class TokenBucket:
+    """
+    Token-bucket rate limiter.
+
+    Tokens refill continuously at `rate` per second up to `capacity`. acquire() takes
+    `cost` tokens and, when the bucket is short, sleeps until the deficit has refilled.
+    A cost larger than the capacity is allowed; the caller simply waits longer.
+    """
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, cost=1):
+        """
+        Take `cost` tokens, blocking until the bucket can cover them.
+
+        Returns:
+            float: Seconds spent waiting
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            # Go into debt so later callers queue behind this one
+            self._tokens -= cost
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+        if wait:
+            logger.debug("Rate limit reached; waiting %.2fs", wait)
+            time.sleep(wait)
+        return wait
+
+# Gmail allows 250 quota units per user per second; leave headroom for other callers.
+# messages.list and messages.get each cost 5 units.
+GMAIL_UNITS_PER_CALL = 5
+gmail_quota = TokenBucket(rate=200, capacity=250)
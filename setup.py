@@ -8,7 +8,7 @@ setup(
         "google-api-python-client>=2.108.0",  # for Gmail API
         "google-auth-oauthlib>=1.1.0",        # for OAuth flow
         "email-reply-parser>=0.5.12",         # for parsing email replies
-        "pytz>=2024.1",                       # for timezone handling
+        "tzdata>=2024.1",                     # time zone database for zoneinfo
         "langchain-openai>=0.0.5",            # for AI processing
         "langchain>=0.3.20",                  # for LangChain functionality
         "langchain-core>=0.3.41",             # for LangChain core components
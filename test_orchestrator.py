@@ -8,14 +8,16 @@ This script mocks the email retrieval and parsing to test the LLM chain processi
 
 import json
 import logging
+from types import MappingProxyType
 from unittest.mock import MagicMock, patch
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Mock email data
-MOCK_EMAIL = {
+# Mock email data, frozen so every parse_emails call can hand out the same object.
+# message_data stays a plain dict because the orchestrator passes it to json.dumps.
+MOCK_EMAIL = MappingProxyType({
     "threadId": "thread123",
     "messageId": "msg123",
     "order": 1,
@@ -37,7 +39,7 @@ MOCK_EMAIL = {
         John Doe
         """
     }
-}
+})
 
 # Mock the EmailRetriever and EmailParser classes
 class MockEmailRetriever:
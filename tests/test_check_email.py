@@ -12,9 +12,14 @@ import json
 import logging
 from typing import List, Dict, Any, Tuple, Set
 from collections import defaultdict
+from unittest.mock import patch
+
+import httplib2
+from googleapiclient.errors import HttpError
 
 # Import the function to test
-from tools.check_email import get_last_n_emails
+from tools.check_email import get_last_n_emails, batch_get_messages, MAX_BATCH_SIZE, NUM_RETRIES
+from libs.rate_limiter import TokenBucket
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
@@ -46,10 +51,20 @@ class MockMessagesResource:
     """
     def __init__(self, all_messages: Dict[str, MockGmailMessage]):
         self.all_messages = all_messages
+        # Derived per-message data, built once instead of on every list() call
+        self.list_rows = {msg_id: msg.as_dict() for msg_id, msg in all_messages.items()}
+        self.positions = {msg_id: position for position, msg_id in enumerate(all_messages)}
+        # Inverted index: label -> IDs of the messages carrying it
+        self.label_index: Dict[str, Set[str]] = defaultdict(set)
+        for msg_id, msg in all_messages.items():
+            for label in msg.label_ids:
+                self.label_index[label].add(msg_id)
         self.list_call_count = 0
         self.get_call_count = 0
         # Track which label combinations were requested
         self.requested_label_combinations = []
+        # Track the page size requested by each list call
+        self.requested_max_results = []
         
     def list(self, **kwargs):
         """Mock the messages.list method."""
@@ -73,42 +88,43 @@ class MockListRequest:
         # Track label combination for this request
         label_ids = sorted(params.get("labelIds", []))
         self.messages_resource.requested_label_combinations.append(tuple(label_ids))
+        self.messages_resource.requested_max_results.append(params.get("maxResults"))
     
-    def execute(self) -> Dict[str, Any]:
+    def execute(self, num_retries: int = 0) -> Dict[str, Any]:
         """Execute the mock list request and return matching messages."""
         self.messages_resource.list_call_count += 1
         
         # Get the parameters for filtering
-        label_ids = set(self.params.get("labelIds", []))
+        label_ids = frozenset(self.params.get("labelIds", []))
         exclusion_query = self.params.get("q", "")
-        exclude_labels = set()
-        
-        # Parse exclusion query to get excluded labels
-        if exclusion_query:
-            for part in exclusion_query.split():
-                if part.startswith("-label:"):
-                    exclude_labels.add(part[7:])  # Remove "-label:" prefix
-        
-        # Filter messages based on include/exclude labels
-        filtered_messages = []
-        for msg in self.messages_resource.all_messages.values():
-            msg_labels = set(msg.label_ids)
-            
-            # Check if message has all required labels
-            has_all_required = all(label in msg_labels for label in label_ids)
-            
-            # Check if message has any excluded labels
-            has_excluded = any(label in msg_labels for label in exclude_labels)
-            
-            if has_all_required and not has_excluded:
-                filtered_messages.append(msg.as_dict())
+        
+        # Parse exclusion query to get excluded labels ("-label:" prefix removed)
+        exclude_labels = frozenset(
+            part[7:] for part in exclusion_query.split() if part.startswith("-label:")
+        )
+        
+        # Keep messages that have all required labels and none of the excluded ones
+        resource = self.messages_resource
+        index = resource.label_index
+        if label_ids:
+            matches = set.intersection(*(index.get(label, set()) for label in label_ids))
+        else:
+            matches = set(resource.list_rows)
+        if exclude_labels:
+            matches -= set.union(*(index.get(label, set()) for label in exclude_labels))
+        
+        # Return matches in mailbox order so page tokens stay stable
+        filtered_messages = [resource.list_rows[msg_id] for msg_id in sorted(matches, key=resource.positions.get)]
         
         # For testing purposes, limiting to 20 messages per page
         max_results = min(self.params.get("maxResults", 20), 20)
-        page_messages = filtered_messages[:max_results]
+        # The page token is the offset of the first message on the page
+        start = int(self.params.get("pageToken") or 0)
+        end = start + max_results
+        page_messages = filtered_messages[start:end]
         
         # If there are more messages, provide a next page token
-        next_page_token = "next_token" if len(filtered_messages) > max_results else None
+        next_page_token = str(end) if len(filtered_messages) > end else None
         
         return {
             "messages": page_messages,
@@ -128,6 +144,32 @@ class MockGetRequest:
             return {}
         return self.message.data
 
+class MockBatchRequest:
+    """
+    Mocks a Gmail API batch request.
+    """
+    def __init__(self, service: "MockGmailService", callback):
+        self.service = service
+        self.callback = callback
+        self.requests = []
+    
+    def add(self, request, request_id=None, callback=None):
+        """Queue a request to run when the batch executes."""
+        self.requests.append((request_id, request, callback or self.callback))
+    
+    def execute(self):
+        """Execute every queued request and invoke its callback."""
+        self.service.batch_call_count += 1
+        self.service.batch_sizes.append(len(self.requests))
+        for request_id, request, callback in self.requests:
+            # Fail with the next queued HTTP status for this message, if any
+            statuses = self.service.failures.get(request_id)
+            if statuses:
+                error = HttpError(httplib2.Response({"status": statuses.pop(0)}), b"")
+                callback(request_id, None, error)
+            else:
+                callback(request_id, request.execute(), None)
+
 class MockUsersResource:
     """
     Mocks the Gmail API users resource.
@@ -145,10 +187,18 @@ class MockGmailService:
     """
     def __init__(self, all_messages: Dict[str, MockGmailMessage]):
         self.messages_resource = MockMessagesResource(all_messages)
+        self.batch_call_count = 0
+        self.batch_sizes = []
+        # Message ID -> HTTP statuses its next batch calls fail with
+        self.failures: Dict[str, List[int]] = {}
     
     def users(self):
         """Return the users resource."""
         return MockUsersResource(self.messages_resource)
+    
+    def new_batch_http_request(self, callback=None):
+        """Return a new mock batch request."""
+        return MockBatchRequest(self, callback)
 
 def create_test_messages(count_per_combination: Dict[Tuple[str, ...], int]) -> Dict[str, MockGmailMessage]:
     """
@@ -185,13 +235,21 @@ class TestGetLastNEmails(unittest.TestCase):
     
     def setUp(self):
         """Set up test cases."""
-        # Define label combinations for testing
+        # Define label combinations for testing. Sorted to match how
+        # MockListRequest records requested combinations.
         self.label_combinations = [
-            ("INBOX", "UNREAD", "IMPORTANT"),  # Combination 1
-            ("INBOX", "IMPORTANT"),            # Combination 2
-            ("INBOX", "UNREAD"),               # Combination 3
-            ("INBOX",)                         # Combination 4
+            tuple(sorted(combo)) for combo in [
+                ("INBOX", "UNREAD", "IMPORTANT"),  # Combination 1
+                ("INBOX", "IMPORTANT"),            # Combination 2
+                ("INBOX", "UNREAD"),               # Combination 3
+                ("INBOX",)                         # Combination 4
+            ]
         ]
+        
+        # The mock has no quota, so give each test a limiter that never waits
+        limiter_patch = patch("tools.check_email.gmail_quota", TokenBucket(rate=1e9, capacity=1e9))
+        limiter_patch.start()
+        self.addCleanup(limiter_patch.stop)
     
     def test_first_combination_sufficient(self):
         """Test when the first label combination has enough threads."""
@@ -332,6 +390,176 @@ class TestGetLastNEmails(unittest.TestCase):
         # Verify results - should only get the 30 non-excluded messages
         self.assertEqual(len(threads), 30, "Should only include messages without excluded labels")
 
+    def test_label_lookups_are_batched(self):
+        """Test that label lookups go through batch requests, not one get() per round trip."""
+        message_counts = {
+            self.label_combinations[0]: 60
+        }
+        
+        # Create test messages and service
+        messages = create_test_messages(message_counts)
+        service = MockGmailService(messages)
+        
+        # Call the function to test
+        threads = get_last_n_emails(service, num_threads=50)
+        
+        # Verify results - one batch per listed page instead of one round trip per message
+        self.assertEqual(len(threads), 50, "Should return exactly 50 threads")
+        list_calls = service.messages_resource.list_call_count
+        self.assertEqual(service.batch_call_count, list_calls,
+                         "Should issue one batch request per listed page")
+        self.assertGreater(service.messages_resource.get_call_count, service.batch_call_count,
+                           "Each batch should carry several message lookups")
+
+    def test_page_size_follows_remaining_threads(self):
+        """Test that list pages are sized to the number of threads still needed."""
+        message_counts = {
+            self.label_combinations[0]: 60
+        }
+        
+        # Create test messages and service
+        messages = create_test_messages(message_counts)
+        service = MockGmailService(messages)
+        
+        # Call the function to test
+        threads = get_last_n_emails(service, num_threads=3)
+        
+        # Verify results - a small request should not pull a full 100-message page
+        self.assertEqual(len(threads), 3, "Should return exactly 3 threads")
+        self.assertEqual(service.messages_resource.requested_max_results, [10],
+                         "Should request a single page sized to the remaining threads")
+
+    def test_unread_and_read_messages_are_collected_once(self):
+        """Test that unread and read inbox messages are each collected once."""
+        # Unread mail comes from the third combination, read mail from the fourth
+        message_counts = {
+            self.label_combinations[2]: 10,
+            self.label_combinations[3]: 10
+        }
+        
+        # Create test messages and service
+        messages = create_test_messages(message_counts)
+        service = MockGmailService(messages)
+        
+        # Call the function to test
+        threads = get_last_n_emails(service, num_threads=50)
+        
+        # Verify results - every thread holds its single message exactly once
+        self.assertEqual(len(threads), 20, "Should return all 20 available threads")
+        self.assertEqual(service.messages_resource.get_call_count, 20,
+                         "Each message should be looked up once")
+        for thread in threads:
+            self.assertEqual(len(thread["messages"]), 1, "Messages should not be collected twice")
+    
+    def test_long_threads_stop_paging_early(self):
+        """Test that paging stops once pages stop yielding new threads."""
+        # 200 messages in a single long thread, plus a handful of short threads
+        labels = list(self.label_combinations[0])
+        messages = {f"msg{i}": MockGmailMessage(f"msg{i}", "thread1", labels) for i in range(1, 201)}
+        for i in range(201, 206):
+            messages[f"msg{i}"] = MockGmailMessage(f"msg{i}", f"thread{i}", labels)
+        service = MockGmailService(messages)
+        
+        # Call the function to test
+        get_last_n_emails(service, num_threads=10)
+        
+        # Verify results - the first combination should give up well before paging all 205 messages
+        first_combo_calls = service.messages_resource.requested_label_combinations.count(self.label_combinations[0])
+        self.assertLess(first_combo_calls, 5, "Should stop paging a combination that yields no new threads")
+
+    def test_full_threads_skip_label_lookups(self):
+        """Test that messages of threads already holding the maximum are not looked up."""
+        # 25 messages of one long thread interleaved with 25 single-message threads
+        labels = list(self.label_combinations[0])
+        messages = {}
+        for i in range(1, 51):
+            thread_id = "thread1" if i % 2 else f"thread{i}"
+            messages[f"msg{i}"] = MockGmailMessage(f"msg{i}", thread_id, labels)
+        service = MockGmailService(messages)
+        
+        # Call the function to test
+        threads = get_last_n_emails(service, num_threads=50)
+        
+        # Verify results - thread1 fills up on the first page, so its 15 messages
+        # on later pages are never looked up
+        self.assertEqual(len(threads), 26, "Should return all 26 available threads")
+        self.assertEqual(service.messages_resource.get_call_count, 35,
+                         "Messages of full threads should not be looked up")
+
+class TestBatchGetMessages(unittest.TestCase):
+    """
+    Test cases for batch_get_messages, focusing on failed calls inside a batch.
+    """
+    
+    def setUp(self):
+        """Set up test cases."""
+        messages = create_test_messages({("INBOX",): 120})
+        self.service = MockGmailService(messages)
+        self.message_ids = list(messages)
+        
+        # The mock has no quota and the tests should not sleep between retries
+        limiter_patch = patch("tools.check_email.gmail_quota", TokenBucket(rate=1e9, capacity=1e9))
+        limiter_patch.start()
+        self.addCleanup(limiter_patch.stop)
+        sleep_patch = patch("tools.check_email.time.sleep")
+        self.sleep = sleep_patch.start()
+        self.addCleanup(sleep_patch.stop)
+    
+    def test_batches_stay_within_size_limit(self):
+        """Test that calls are split into batches of at most MAX_BATCH_SIZE."""
+        fetched = batch_get_messages(self.service, self.message_ids)
+        
+        self.assertEqual(len(fetched), 120, "Should fetch every message")
+        self.assertEqual(self.service.batch_sizes, [MAX_BATCH_SIZE, MAX_BATCH_SIZE, 20])
+    
+    def test_rate_limited_and_server_errors_are_retried(self):
+        """Test that 429 and 5xx failures are retried until they succeed."""
+        self.service.failures = {"msg1": [429], "msg2": [503, 500]}
+        
+        fetched = batch_get_messages(self.service, self.message_ids)
+        
+        self.assertEqual(len(fetched), 120, "Retried messages should not be dropped")
+        self.assertEqual(self.service.batch_sizes[3:], [2, 1], "Only failed calls should be retried")
+        self.assertEqual(self.sleep.call_count, 2, "Should back off before each retry round")
+    
+    def test_missing_messages_are_skipped(self):
+        """Test that messages that no longer exist are left out without retrying."""
+        self.service.failures = {"msg1": [404]}
+        
+        fetched = batch_get_messages(self.service, self.message_ids)
+        
+        self.assertEqual(len(fetched), 119)
+        self.assertNotIn("msg1", fetched)
+        self.assertEqual(self.service.batch_call_count, 3, "404s should not be retried")
+    
+    def test_other_errors_raise(self):
+        """Test that errors other than 404, 429, and 5xx are raised."""
+        self.service.failures = {"msg1": [403]}
+        
+        with self.assertRaises(HttpError) as context:
+            batch_get_messages(self.service, self.message_ids)
+        self.assertEqual(context.exception.resp.status, 403)
+    
+    def test_errors_are_collected_when_requested(self):
+        """Test that failures are returned in the errors dict instead of raised when one is given."""
+        self.service.failures = {"msg1": [403], "msg2": [429] * (NUM_RETRIES + 1)}
+        errors = {}
+        
+        fetched = batch_get_messages(self.service, self.message_ids, errors=errors)
+        
+        self.assertEqual(len(fetched), 118, "Other messages should still be fetched")
+        self.assertEqual({message_id: error.resp.status for message_id, error in errors.items()},
+                         {"msg1": 403, "msg2": 429})
+    
+    def test_persistent_rate_limiting_raises(self):
+        """Test that a call still failing after NUM_RETRIES retries is raised."""
+        self.service.failures = {"msg1": [429] * (NUM_RETRIES + 1)}
+        
+        with self.assertRaises(HttpError) as context:
+            batch_get_messages(self.service, self.message_ids)
+        self.assertEqual(context.exception.resp.status, 429)
+        self.assertEqual(self.sleep.call_count, NUM_RETRIES)
+
 def main():
     """Run the tests and display results."""
     unittest.main()
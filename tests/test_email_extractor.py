@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+test_email_extractor.py
+
+This module provides tests for extract_full_content in tools/email_extractor.py,
+focusing on which MIME part is chosen from a multipart message.
+"""
+
+import base64
+import unittest
+
+from tools.email_extractor import extract_full_content
+
+def encode(text: str) -> str:
+    """Encode text the way the Gmail API returns message bodies."""
+    return base64.urlsafe_b64encode(text.encode("utf-8")).decode("ascii")
+
+def part(mime_type: str, text: str = "", parts=None) -> dict:
+    """Build a MIME part with an optional body and child parts."""
+    result = {"mimeType": mime_type, "body": {"data": encode(text)} if text else {}}
+    if parts is not None:
+        result["parts"] = parts
+    return result
+
+class TestExtractFullContent(unittest.TestCase):
+    """
+    Test cases for extract_full_content.
+    """
+    
+    def test_html_only_message_returns_stripped_text(self):
+        """Test that an HTML-only multipart message falls back to the HTML with tags stripped."""
+        html = "<html><head><style>p {color: red}</style></head><body><p>Hello <b>there</b></p></body></html>"
+        message = {"payload": part("multipart/mixed", parts=[
+            part("multipart/alternative", parts=[part("text/html", html)]),
+            part("application/pdf")
+        ])}
+        
+        self.assertEqual(extract_full_content(message), "Hello there")
+    
+    def test_url_inside_style_block_keeps_body(self):
+        """Test that a URL inside a <style> block does not swallow the body between two style blocks."""
+        html = (
+            "<html><head><style>.logo {background:url(https://x.com/a.png)}</style></head>"
+            "<body><p>Hello there, please confirm the meeting.</p>"
+            "<style>.footer {color: gray}</style><p>Thanks</p></body></html>"
+        )
+        message = {"payload": part("text/html", html)}
+        
+        self.assertEqual(extract_full_content(message), "Hello there, please confirm the meeting.Thanks")
+    
+    def test_link_text_is_kept(self):
+        """Test that the text of a link survives removal of the URL in its href."""
+        message = {"payload": part("text/html", '<p>Please <a href="https://x.com/rsvp">RSVP here</a> today</p>')}
+        
+        self.assertEqual(extract_full_content(message), "Please RSVP here today")
+    
+    def test_plain_text_wins_over_html(self):
+        """Test that a text/plain part is preferred even when the HTML part comes first."""
+        message = {"payload": part("multipart/alternative", parts=[
+            part("text/html", "<p>HTML version</p>"),
+            part("text/plain", "Plain version")
+        ])}
+        
+        self.assertEqual(extract_full_content(message), "Plain version")
+    
+    def test_long_content_is_truncated(self):
+        """Test that content longer than max_chars is truncated with a marker."""
+        message = {"payload": part("text/plain", "x" * 50)}
+        
+        self.assertEqual(extract_full_content(message, max_chars=10), "x" * 10 + " ... [truncated]")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+test_email_labeler.py
+
+This module provides tests for get_or_create_label in tools/email_labeler.py,
+focusing on the label cache and on label creation conflicts (HTTP 409).
+"""
+
+import unittest
+from typing import Dict, List
+
+import httplib2
+from googleapiclient.errors import HttpError
+
+from tools.email_labeler import get_or_create_label
+
+class MockRequest:
+    """
+    Mocks a Gmail API request that returns a fixed result or raises an error.
+    """
+    def __init__(self, result=None, error=None):
+        self.result = result
+        self.error = error
+    
+    def execute(self):
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+class MockLabelsResource:
+    """
+    Mocks the Gmail API labels resource. create() fails with 409 when asked to.
+    """
+    def __init__(self, labels: Dict[str, str]):
+        self.labels = dict(labels)
+        self.list_call_count = 0
+        # Labels that another client creates just before our create() call conflicts
+        self.created_elsewhere: Dict[str, str] = {}
+        # Names that conflict with an existing label without matching it exactly
+        self.conflicting_names: List[str] = []
+    
+    def list(self, userId):
+        self.list_call_count += 1
+        return MockRequest({"labels": [{"name": name, "id": label_id} for name, label_id in self.labels.items()]})
+    
+    def create(self, userId, body):
+        name = body["name"]
+        if name in self.created_elsewhere:
+            self.labels[name] = self.created_elsewhere.pop(name)
+            return MockRequest(error=HttpError(httplib2.Response({"status": 409}), b"Label name exists"))
+        if name in self.conflicting_names:
+            return MockRequest(error=HttpError(httplib2.Response({"status": 409}), b"Label name exists or conflicts"))
+        label_id = f"Label_{len(self.labels) + 1}"
+        self.labels[name] = label_id
+        return MockRequest({"name": name, "id": label_id})
+
+class MockGmailService:
+    """
+    Mocks the Gmail API service with only the labels resource.
+    """
+    def __init__(self, labels: Dict[str, str]):
+        self.labels_resource = MockLabelsResource(labels)
+    
+    def users(self):
+        return self
+    
+    def labels(self):
+        return self.labels_resource
+
+class TestGetOrCreateLabel(unittest.TestCase):
+    """
+    Test cases for get_or_create_label.
+    """
+    
+    def test_existing_labels_are_listed_once(self):
+        """Test that repeated lookups are served from the label cache."""
+        service = MockGmailService({"Q_Draft": "Label_1", "Q_Decline": "Label_2"})
+        
+        self.assertEqual(get_or_create_label(service, "Q_Draft"), "Label_1")
+        self.assertEqual(get_or_create_label(service, "Q_Decline"), "Label_2")
+        self.assertEqual(service.labels_resource.list_call_count, 1)
+    
+    def test_conflict_with_label_created_elsewhere_refreshes_cache(self):
+        """Test that a 409 for a label created since the cache was filled returns its ID."""
+        service = MockGmailService({"Q_Draft": "Label_1"})
+        get_or_create_label(service, "Q_Draft")
+        service.labels_resource.created_elsewhere["Q_Archive"] = "Label_9"
+        
+        self.assertEqual(get_or_create_label(service, "Q_Archive"), "Label_9")
+        self.assertEqual(service.labels_resource.list_call_count, 2, "Should re-list labels after the conflict")
+    
+    def test_conflict_without_matching_label_reraises(self):
+        """Test that a 409 for a name still missing after the refresh raises the HttpError."""
+        service = MockGmailService({"Q_DRAFT": "Label_1"})
+        service.labels_resource.conflicting_names.append("q_draft")
+        
+        with self.assertRaises(HttpError) as context:
+            get_or_create_label(service, "q_draft")
+        self.assertEqual(context.exception.resp.status, 409)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+test_email_parser.py
+
+This module provides tests for EmailParser in tools/email_parser.py, focusing on
+messages that fail to fetch in the batched prefetch.
+"""
+
+import base64
+import unittest
+from typing import Dict, Any
+from unittest.mock import patch
+
+import httplib2
+from googleapiclient.errors import HttpError
+
+from libs.rate_limiter import TokenBucket
+from tools.email_parser import EmailParser
+
+def make_message(message_id: str, thread_id: str, body: str) -> Dict[str, Any]:
+    """Build a full Gmail message with a plain text body."""
+    return {
+        "id": message_id,
+        "threadId": thread_id,
+        "labelIds": ["INBOX"],
+        "payload": {
+            "mimeType": "text/plain",
+            "headers": [{"name": "Subject", "value": f"Subject {message_id}"}],
+            "body": {"data": base64.urlsafe_b64encode(body.encode("utf-8")).decode("ascii")}
+        }
+    }
+
+class MockGetRequest:
+    """
+    Mocks a messages.get request; only its message ID is needed by the batch.
+    """
+    def __init__(self, message_id: str):
+        self.message_id = message_id
+
+class MockBatchRequest:
+    """
+    Mocks a batch request that answers each call from the service's messages or failures.
+    """
+    def __init__(self, service: "MockGmailService", callback):
+        self.service = service
+        self.callback = callback
+        self.request_ids = []
+    
+    def add(self, request, request_id=None):
+        """Queue a request to run when the batch executes."""
+        self.request_ids.append(request_id)
+    
+    def execute(self):
+        """Invoke the callback for every queued request."""
+        for request_id in self.request_ids:
+            status = self.service.failures.get(request_id)
+            if status is not None:
+                self.callback(request_id, None, HttpError(httplib2.Response({"status": status}), b""))
+            else:
+                self.callback(request_id, self.service.messages_by_id[request_id], None)
+
+class MockGmailService:
+    """
+    Mocks the parts of the Gmail API service used by EmailParser.
+    """
+    def __init__(self, messages_by_id: Dict[str, Dict[str, Any]], failures: Dict[str, int]):
+        self.messages_by_id = messages_by_id
+        # Message ID -> HTTP status its get() call fails with
+        self.failures = failures
+    
+    def users(self):
+        return self
+    
+    def messages(self):
+        return self
+    
+    def get(self, userId, id, format):
+        return MockGetRequest(id)
+    
+    def new_batch_http_request(self, callback=None):
+        return MockBatchRequest(self, callback)
+
+class TestParseEmails(unittest.TestCase):
+    """
+    Test cases for EmailParser.parse_emails.
+    """
+    
+    def setUp(self):
+        """Set up test cases."""
+        # The mock has no quota, so use a limiter that never waits
+        limiter_patch = patch("tools.check_email.gmail_quota", TokenBucket(rate=1e9, capacity=1e9))
+        limiter_patch.start()
+        self.addCleanup(limiter_patch.stop)
+        
+        self.messages_by_id = {
+            "msg1": make_message("msg1", "thread1", "First message"),
+            "msg2": make_message("msg2", "thread1", "Second message"),
+            "msg3": make_message("msg3", "thread2", "Third message")
+        }
+        self.threads = [
+            {"thread_id": "thread1", "messages": [
+                {"messageId": "msg1", "threadId": "thread1", "order": 1},
+                {"messageId": "msg2", "threadId": "thread1", "order": 2}
+            ]},
+            {"thread_id": "thread2", "messages": [
+                {"messageId": "msg3", "threadId": "thread2", "order": 1}
+            ]}
+        ]
+    
+    def test_all_messages_are_parsed(self):
+        """Test that every fetched message is parsed with its full content."""
+        parser = EmailParser(MockGmailService(self.messages_by_id, {}))
+        
+        parsed, full_content = parser.parse_emails(self.threads)
+        
+        self.assertEqual([entry["messageId"] for entry in parsed], ["msg1", "msg2", "msg3"])
+        self.assertEqual(full_content["msg2"]["full_content"], "Second message")
+        self.assertEqual(parsed[0]["message_data"]["subject"], "Subject msg1")
+    
+    def test_failed_fetch_skips_only_that_message(self):
+        """Test that a message failing with a non-retryable error is skipped rather than aborting the batch."""
+        parser = EmailParser(MockGmailService(self.messages_by_id, {"msg2": 403}))
+        
+        with self.assertLogs("tools.email_parser", level="ERROR") as logs:
+            parsed, full_content = parser.parse_emails(self.threads)
+        
+        self.assertEqual([entry["messageId"] for entry in parsed], ["msg1", "msg3"])
+        self.assertNotIn("msg2", full_content)
+        self.assertTrue(any("msg2" in line for line in logs.output), "The failure should be logged")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+test_human_feedback.py
+
+This module provides tests for get_yes_no_feedback_bulk in tools/human_feedback.py,
+with input() patched to supply the user's answers.
+"""
+
+import io
+import unittest
+from contextlib import redirect_stdout
+from unittest.mock import patch
+
+from tools.human_feedback import get_yes_no_feedback_bulk
+
+class TestGetYesNoFeedbackBulk(unittest.TestCase):
+    """
+    Test cases for get_yes_no_feedback_bulk.
+    """
+    
+    def setUp(self):
+        """Set up test cases."""
+        self.items = [
+            (None, "respond", {"subject": "Lunch?", "to": ["a@example.com", "b@example.com"]}),
+            ("Is this a meeting request?", None, None),
+            (None, "decline", "Vendor pitch")
+        ]
+    
+    def ask(self, answers):
+        """Run the bulk prompt with input() returning the given lines, capturing the output."""
+        output = io.StringIO()
+        with patch("builtins.input", side_effect=answers) as mock_input, redirect_stdout(output):
+            results = get_yes_no_feedback_bulk(self.items)
+        return results, mock_input, output.getvalue()
+    
+    def test_results_are_returned_in_order(self):
+        """Test that each answer is paired with its item in order."""
+        results, mock_input, _ = self.ask(["correct wrong correct"])
+        
+        self.assertEqual(results, [(True, "correct"), (False, "wrong"), (True, "correct")])
+        self.assertEqual(mock_input.call_count, 1, "All answers should be read with one prompt")
+    
+    def test_shorthand_answers_are_expanded(self):
+        """Test that 'c' and 'w' map to 'correct' and 'wrong', in any case."""
+        results, _, _ = self.ask(["W c C"])
+        
+        self.assertEqual(results, [(False, "wrong"), (True, "correct"), (True, "correct")])
+    
+    def test_invalid_answers_reprompt(self):
+        """Test that a wrong answer count or an unknown answer asks again."""
+        results, mock_input, output = self.ask(["correct wrong", "correct maybe wrong", "c w c"])
+        
+        self.assertEqual(mock_input.call_count, 3)
+        self.assertEqual(output.count("Please enter exactly 3 answers"), 2)
+        self.assertEqual(results, [(True, "correct"), (False, "wrong"), (True, "correct")])
+    
+    def test_questions_and_context_are_displayed(self):
+        """Test that each question is numbered and shown with its context."""
+        _, _, output = self.ask(["c c c"])
+        
+        self.assertIn("1. I think we should respond.", output)
+        self.assertIn("to:\n    a@example.com\n    b@example.com", output)
+        self.assertIn("2. Is this a meeting request?", output)
+        self.assertIn("3. I think we should politely decline.\nVendor pitch", output)
+    
+    def test_feedback_is_logged_per_decision(self):
+        """Test that confirmed and overridden decisions are logged, skipping items without one."""
+        with self.assertLogs("tools.human_feedback", level="INFO") as logs:
+            self.ask(["c w w"])
+        
+        self.assertEqual(logs.output, [
+            "INFO:tools.human_feedback:Human confirmed AI decision: respond",
+            "INFO:tools.human_feedback:Human overrode AI decision: decline"
+        ])
+    
+    def test_no_items_skips_the_prompt(self):
+        """Test that an empty list returns immediately without asking."""
+        with patch("builtins.input") as mock_input:
+            self.assertEqual(get_yes_no_feedback_bulk([]), [])
+        mock_input.assert_not_called()
+
+if __name__ == "__main__":
+    unittest.main()
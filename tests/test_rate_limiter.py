@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+test_rate_limiter.py
+
+This module provides tests for the TokenBucket rate limiter in libs/rate_limiter.py,
+using a fake clock so no test actually sleeps.
+"""
+
+import unittest
+from unittest.mock import patch
+
+from libs.rate_limiter import TokenBucket
+
+class FakeClock:
+    """
+    Stands in for time.monotonic and time.sleep; sleeping advances the clock.
+    """
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps = []
+    
+    def monotonic(self) -> float:
+        return self.now
+    
+    def sleep(self, seconds: float) -> None:
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+class TestTokenBucket(unittest.TestCase):
+    """
+    Test cases for TokenBucket.acquire.
+    """
+    
+    def setUp(self):
+        """Patch the clock used by the rate limiter."""
+        self.clock = FakeClock()
+        for name in ("monotonic", "sleep"):
+            clock_patch = patch(f"libs.rate_limiter.time.{name}", getattr(self.clock, name))
+            clock_patch.start()
+            self.addCleanup(clock_patch.stop)
+        self.bucket = TokenBucket(rate=10, capacity=20)
+    
+    def test_no_wait_while_capacity_lasts(self):
+        """Test that acquiring within the capacity returns immediately."""
+        self.assertEqual(self.bucket.acquire(5), 0)
+        self.assertEqual(self.bucket.acquire(15), 0)
+        self.assertEqual(self.clock.sleeps, [])
+    
+    def test_waits_for_the_deficit_to_refill(self):
+        """Test that an empty bucket waits exactly long enough to cover the deficit."""
+        self.bucket.acquire(20)
+        
+        self.assertAlmostEqual(self.bucket.acquire(5), 0.5)
+        self.assertEqual(self.clock.sleeps, [0.5])
+    
+    def test_debt_queues_later_callers(self):
+        """Test that a caller behind one already in debt waits for both deficits."""
+        self.bucket.acquire(20)
+        self.bucket.acquire(10)  # Sleeps 1s; the clock advances, so the debt is now repaid
+        self.clock.now -= 1.0  # Rewind as if a second caller arrived before the first woke up
+        
+        self.assertAlmostEqual(self.bucket.acquire(10), 2.0)
+    
+    def test_refill_is_capped_at_capacity(self):
+        """Test that idle time does not accumulate more tokens than the capacity."""
+        self.clock.now += 3600
+        self.bucket.acquire(20)
+        
+        self.assertAlmostEqual(self.bucket.acquire(10), 1.0)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,34 @@
+#!/usr/bin/env python3
+"""
+test_text_cleaner.py
+
+This module provides tests for clean_text in tools/text_cleaner.py, focusing on
+the removal of URLs, image tags, and invisible characters.
+"""
+
+import unittest
+
+from tools.text_cleaner import clean_text
+
+class TestCleanText(unittest.TestCase):
+    """
+    Test cases for clean_text.
+    """
+    
+    def test_image_tags_and_urls_are_removed(self):
+        """Test that bracketed image tags and standalone URLs are removed."""
+        text = "See [https://example.com/logo.png] and https://example.com/page for details"
+        self.assertEqual(clean_text(text), "See and for details")
+    
+    def test_url_running_into_image_tag(self):
+        """Test that a URL directly followed by an image tag removes both completely."""
+        text = "Logo: https://example.com/home[https://example.com/logo.png Company] Welcome"
+        self.assertEqual(clean_text(text), "Logo: Welcome")
+    
+    def test_invisible_characters_and_whitespace(self):
+        """Test that zero-width characters are dropped and whitespace is collapsed per line."""
+        text = "Hello\u200b  \tworld&amp;co\n  next line  "
+        self.assertEqual(clean_text(text), "Hello world&co\nnext line")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+test_tools_package.py
+
+Tests that the helpers exported by the tools package resolve to functions regardless
+of the order in which the package and its submodules are imported.
+"""
+
+import os
+import subprocess
+import sys
+import unittest
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def run_snippet(code: str) -> subprocess.CompletedProcess:
+    """Run code in a fresh interpreter so import order starts from scratch."""
+    return subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=REPO_ROOT, capture_output=True, text=True, timeout=60
+    )
+
+class TestToolsPackageImports(unittest.TestCase):
+    """
+    Test cases for the tools package exports and import order.
+    """
+    
+    def test_submodule_import_does_not_shadow_extract_headers(self):
+        """Test that importing tools.extract_headers first still exports the function."""
+        result = run_snippet(
+            "import tools.extract_headers\n"
+            "from tools import extract_headers\n"
+            "assert callable(extract_headers), extract_headers\n"
+        )
+        self.assertEqual(result.returncode, 0, result.stderr)
+
+    def test_exports_are_functions_after_submodule_imports(self):
+        """Test that every name in __all__ is callable after importing helper submodules directly."""
+        result = run_snippet(
+            "from tools.extract_metadata import extract_all\n"
+            "import tools.extract_label_ids, tools.extract_mimetype\n"
+            "import tools\n"
+            "for name in tools.__all__:\n"
+            "    assert callable(getattr(tools, name)), name\n"
+            "assert extract_all({})['labelIds'] == []\n"
+        )
+        self.assertEqual(result.returncode, 0, result.stderr)
+
+if __name__ == "__main__":
+    unittest.main()
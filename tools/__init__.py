@@ -1,13 +1,35 @@
+import importlib
+
+# extract_headers shares its name with its submodule. Importing it eagerly binds the
+# package attribute to the function before any "import tools.extract_headers" runs;
+# resolved lazily, that import would leave the attribute bound to the submodule.
 from .extract_headers import extract_headers
-from .extract_label_ids import extract_message_labels
-from .extract_mimetype import extract_message_mime_type
-from .email_extractor import extract_full_content
-from .check_snoozed_email import is_email_snoozed
+
+# The other helpers are imported on first attribute access (PEP 562), so importing a
+# single tool such as tools.check_email does not pull in every parser's dependencies.
+_lazy_imports = {
+    'extract_message_labels': '.extract_label_ids',
+    'extract_message_mime_type': '.extract_mimetype',
+    'extract_full_content': '.email_extractor',
+    'is_email_snoozed': '.check_snoozed_email',
+    'extract_all': '.extract_metadata'
+}
 
 __all__ = [
     'extract_headers',
     'extract_message_labels',
     'extract_message_mime_type',
     'extract_full_content',
-    'is_email_snoozed'
-] 
\ No newline at end of file
+    'is_email_snoozed',
+    'extract_all'
+]
+
+def __getattr__(name):
+    if name in _lazy_imports:
+        value = getattr(importlib.import_module(_lazy_imports[name], __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -11,9 +11,142 @@ This module provides functions to:
   the general INBOX if needed.
 """
 import logging
+import math
+import random
 import time
+from googleapiclient.errors import HttpError
+from libs.rate_limiter import gmail_quota, GMAIL_UNITS_PER_CALL
 logger = logging.getLogger(__name__)
 
+# Retries for 429 and 5xx responses; googleapiclient backs off exponentially between them.
+# Failed calls inside a batch request are retried the same number of times by batch_get_messages.
+NUM_RETRIES = 3
+
+# Gmail accepts up to 100 calls in a batch request, but batches larger than 50 are
+# likely to trigger rate limiting.
+MAX_BATCH_SIZE = 50
+
+# Stop paging a label combination once fewer than this share of a page's new
+# messages start new threads (e.g. an inbox dominated by a few long threads).
+MIN_NEW_THREAD_RATIO = 0.1
+
+# Category tabs excluded from every label combination
+_CATEGORY_LABELS = ("CATEGORY_SOCIAL", "CATEGORY_PROMOTIONS", "CATEGORY_UPDATES", "CATEGORY_FORUMS")
+
+# Label combinations in priority order, as (include labels, exclude labels).
+# We only include emails in the INBOX.
+LABEL_COMBINATIONS = (
+    (("UNREAD", "INBOX", "IMPORTANT"), _CATEGORY_LABELS),  # ROUND 1: Inbox + Unread + Important
+    (("INBOX", "IMPORTANT"), _CATEGORY_LABELS + ("UNREAD",)),  # ROUND 2: Inbox + Read + Important
+    (("UNREAD", "INBOX"), _CATEGORY_LABELS + ("IMPORTANT",)),  # ROUND 3: Unread + Inbox + NOT Important
+    # ROUND 4: Inbox + Read. Gmail has no READ label; read mail is mail without UNREAD.
+    (("INBOX",), _CATEGORY_LABELS + ("IMPORTANT", "UNREAD")),
+)
+
+# Per combination: include labels, exclude set for post-filtering, and the list() exclusion query
+_LABEL_ROUNDS = tuple(
+    (list(include), frozenset(exclude), " ".join(f"-label:{lbl}" for lbl in exclude))
+    for include, exclude in LABEL_COMBINATIONS
+)
+
+def _error_status(exception):
+    """
+    Return the HTTP status of a failed batch call, or None if it was not an HTTP error.
+    """
+    if isinstance(exception, HttpError):
+        return exception.resp.status
+    return None
+
+def batch_get_messages(service, message_ids, message_format="full", errors=None) -> dict:
+    """
+    Fetch many messages with messages.get, grouped into batch requests of up to
+    MAX_BATCH_SIZE calls.
+
+    Calls that fail with 429 or 5xx are retried in a later batch, with exponential
+    backoff, up to NUM_RETRIES times. Messages that no longer exist (404) are skipped.
+
+    Args:
+        service: Authorized Gmail API service instance.
+        message_ids (list): IDs of the messages to fetch.
+        message_format (str): The messages.get format, e.g. "full" or "minimal".
+        errors (dict, optional): When given, calls that fail with any other error, or
+            still fail after the retries, are recorded here as message ID -> exception
+            and left out of the result instead of being raised.
+
+    Returns:
+        dict: Mapping of message ID to the message resource.
+
+    Raises:
+        HttpError: If errors is None and a call fails with any other error, or still
+            fails after the retries.
+    """
+    messages = {}
+    pending = list(message_ids)
+
+    for attempt in range(NUM_RETRIES + 1):
+        if attempt:
+            # Same randomized exponential backoff googleapiclient uses for num_retries
+            delay = random.random() * 2 ** attempt
+            logger.warning("Retrying %d failed message fetches in %.1fs", len(pending), delay)
+            time.sleep(delay)
+
+        retry_errors = {}
+        fatal_errors = []
+
+        def _collect(request_id, response, exception):
+            if exception is None:
+                messages[request_id] = response
+                return
+            status = _error_status(exception)
+            if status == 404:
+                logger.warning("Message %s no longer exists; skipping it", request_id)
+            elif status is not None and (status == 429 or status >= 500):
+                retry_errors[request_id] = exception
+            elif errors is not None:
+                errors[request_id] = exception
+            else:
+                fatal_errors.append(exception)
+
+        for start in range(0, len(pending), MAX_BATCH_SIZE):
+            chunk = pending[start:start + MAX_BATCH_SIZE]
+            batch = service.new_batch_http_request(callback=_collect)
+            for message_id in chunk:
+                batch.add(
+                    service.users().messages().get(userId="me", id=message_id, format=message_format),
+                    request_id=message_id
+                )
+            # Every call inside a batch is billed against the quota individually.
+            gmail_quota.acquire(GMAIL_UNITS_PER_CALL * len(chunk))
+            batch.execute()
+            if fatal_errors:
+                raise fatal_errors[0]
+
+        if not retry_errors:
+            return messages
+        pending = list(retry_errors)
+
+    logger.error("Giving up on %d message fetches after %d retries", len(pending), NUM_RETRIES)
+    if errors is None:
+        raise retry_errors[pending[-1]]
+    errors.update(retry_errors)
+    return messages
+
+def fetch_label_ids(service, message_ids) -> dict:
+    """
+    Fetch labelIds for many messages using Gmail batch requests instead of one
+    messages.get round trip per message.
+
+    Args:
+        service: Authorized Gmail API service instance.
+        message_ids (list): IDs of the messages to look up.
+
+    Returns:
+        dict: Mapping of message ID to its list of label IDs. Messages that no
+              longer exist are omitted.
+    """
+    messages = batch_get_messages(service, message_ids, message_format="minimal")
+    return {message_id: message.get("labelIds", []) for message_id, message in messages.items()}
+
 def get_last_n_emails(service, num_threads=50) -> list:
     """
     Retrieve up to num_threads from the user's INBOX, excluding any messages with the specified global labels.
@@ -27,6 +160,8 @@ def get_last_n_emails(service, num_threads=50) -> list:
     
     The function uses the "q" parameter to initially filter out unwanted labels, but since the list() call 
     may still return messages that include some of the excluded labels, a post-filtering step is performed.
+    Messages already listed under an earlier combination are skipped, and a combination stops paging once
+    a page yields few new threads or its page budget is spent.
     
     Args:
         service: Authorized Gmail API service instance.
@@ -38,131 +173,101 @@ def get_last_n_emails(service, num_threads=50) -> list:
               - messages: A list of message dictionaries (each with "messageId", "threadId", "order", and "labelIds").
     """
     MAX_MESSAGES_PER_THREAD = 5
-    time.sleep(1)
-
-    # exclude labels
-    exclude_labels = [
-        ["CATEGORY_SOCIAL",
-        "CATEGORY_PROMOTIONS",
-        "CATEGORY_UPDATES",
-        "CATEGORY_FORUMS"],
-        ["CATEGORY_SOCIAL",
-        "CATEGORY_PROMOTIONS",
-        "CATEGORY_UPDATES",
-        "CATEGORY_FORUMS",
-        "UNREAD"],
-        ["CATEGORY_SOCIAL",
-        "CATEGORY_PROMOTIONS",
-        "CATEGORY_UPDATES",
-        "CATEGORY_FORUMS",
-        "IMPORTANT"],
-        ["CATEGORY_SOCIAL",
-        "CATEGORY_PROMOTIONS",
-        "CATEGORY_UPDATES",
-        "CATEGORY_FORUMS",
-        "IMPORTANT",
-        "READ"]
-    ]
-    
-    # We only include emails in the INBOX.
-    include_labels = [
-        ["UNREAD","INBOX","IMPORTANT"], # ROUND 1: Inbox + Unread + Important
-        ["INBOX","IMPORTANT"], # ROUND 2: Inbox + Read + Important
-        ["UNREAD","INBOX"], # ROUND 3: Unread + Inbox + NOT Important 
-        ["INBOX"] # ROUND 4: Inbox + Read
-    ]
-
-    # Create iterators for the label lists
-    exclude_labels_iter = iter(exclude_labels)
-    include_labels_iter = iter(include_labels)
-    
+
     threads = {}  # key: threadId, value: list of messages in that thread
-    
-    # Flag to track if we have more label combinations to try
-    has_more_label_combinations = True
-    
-    # Get the first set of labels
-    try:
-        current_exclude_labels = next(exclude_labels_iter)
-        current_include_labels = next(include_labels_iter)
-    except StopIteration:
-        # Handle the case where either list is empty
-        logger.error("Label lists cannot be empty")
-        return []
+    seen_message_ids = set()  # messages already listed, since combinations can overlap
     
     # Main loop - continue until we have enough threads or no more label combinations
-    while len(threads) < num_threads and has_more_label_combinations:
-        logger.info(f"Trying label combination - Include: {current_include_labels}, Exclude: {current_exclude_labels}")
+    for current_include_labels, exclude_set, exclusion_query in _LABEL_ROUNDS:
+        if len(threads) >= num_threads:
+            break
+        logger.info("Trying label combination - Include: %s, Exclude: %s", current_include_labels, exclusion_query)
         
-        # Build a query string to preliminarily exclude unwanted labels
-        exclusion_query = " ".join(f"-label:{lbl}" for lbl in current_exclude_labels)
+        # Bound the pages spent on one combination by the threads still needed.
+        max_pages = math.ceil((num_threads - len(threads)) / 20) + 1
+        pages_fetched = 0
         
         page_token = None
         # Start with first page (page_token is None) and continue while there are more pages
         first_page = True
         while len(threads) < num_threads and (first_page or page_token is not None):
             first_page = False  # After first iteration, we're no longer on first page
+            # Size the page to the threads still missing instead of always pulling 100 rows.
+            remaining = num_threads - len(threads)
             params = {
                 "userId": "me",
                 "labelIds": current_include_labels,
                 "q": exclusion_query,
-                "maxResults": 100,  # Request up to 100 messages per page.
+                "maxResults": min(100, max(10, remaining * 2)),
                 "fields": "nextPageToken, messages(id, threadId)"
             }
             if page_token:
                 params["pageToken"] = page_token
 
-            results = service.users().messages().list(**params).execute()
+            gmail_quota.acquire(GMAIL_UNITS_PER_CALL)
+            results = service.users().messages().list(**params).execute(num_retries=NUM_RETRIES)
             msgs = results.get("messages", [])
             
             if not msgs:
-                logger.info("No messages found with current label combination")
+                logger.debug("No messages found with current label combination")
                 break  # No messages found with current label combination
             
-            for msg in msgs:
+            # Skip messages an earlier combination already listed.
+            new_msgs = [msg for msg in msgs if msg["id"] not in seen_message_ids]
+            seen_message_ids.update(msg["id"] for msg in new_msgs)
+            threads_before = len(threads)
+            
+            # Threads that already hold MAX_MESSAGES_PER_THREAD messages cannot take more,
+            # so their messages need no label lookup.
+            candidates = [
+                msg for msg in new_msgs
+                if len(threads.get(msg["threadId"], ())) < MAX_MESSAGES_PER_THREAD
+            ]
+            
+            # Retrieve labelIds for the remaining messages in batched round trips.
+            page_label_ids = fetch_label_ids(service, [msg["id"] for msg in candidates])
+            
+            for msg in candidates:
                 if len(threads) >= num_threads:
                     break  # We have enough threads
                     
-                thread_id = msg.get("threadId")
-                # Retrieve full message to get detailed fields, including labelIds.
-                full_msg = service.users().messages().get(userId="me", id=msg.get("id"), format="full").execute()
-                label_ids = full_msg.get("labelIds", [])
+                message_id = msg["id"]
+                label_ids = page_label_ids.get(message_id)
+                if label_ids is None:
+                    continue  # Label lookup failed; we cannot post-filter this message.
                 
                 # Post-filter: skip message if any global exclusion label is present.
-                if any(label in label_ids for label in current_exclude_labels):
+                if not exclude_set.isdisjoint(label_ids):
                     continue
                 
-                # Prepare message: copy 'id' to 'messageId' and remove 'id'.
-                msg["messageId"] = msg.get("id")
-                if "id" in msg:
-                    del msg["id"]
-                msg["threadId"] = thread_id
-                
-                # Append message to the thread.
-                if thread_id not in threads:
-                    msg["order"] = 1
-                    threads[thread_id] = [msg]
-                else:
-                    if len(threads[thread_id]) < MAX_MESSAGES_PER_THREAD:
-                        msg["order"] = len(threads[thread_id]) + 1
-                        threads[thread_id].append(msg)
+                # Append message to the thread, building only the keys callers use.
+                thread_id = msg["threadId"]
+                thread_msgs = threads.setdefault(thread_id, [])
+                if len(thread_msgs) < MAX_MESSAGES_PER_THREAD:
+                    thread_msgs.append({
+                        "messageId": message_id,
+                        "threadId": thread_id,
+                        "labelIds": label_ids,
+                        "order": len(thread_msgs) + 1
+                    })
             
             # Get the next page token
             page_token = results.get("nextPageToken")
             if not page_token:
-                logger.info("No more pages to retrieve for current label combination")
+                logger.debug("No more pages to retrieve for current label combination")
                 break  # No more pages for this label combination
-        
-        # If we still need more threads, try the next label combination
-        if len(threads) < num_threads:
-            try:
-                current_exclude_labels = next(exclude_labels_iter)
-                current_include_labels = next(include_labels_iter)
-                logger.info("Moving to next label combination")
-            except StopIteration:
-                # We've exhausted all label combinations
-                logger.info("No more label combinations to try")
-                has_more_label_combinations = False
+            
+            if new_msgs:
+                pages_fetched += 1
+                if len(threads) - threads_before < MIN_NEW_THREAD_RATIO * len(new_msgs):
+                    logger.info("Few new threads on this page; moving on from current label combination")
+                    break
+                if pages_fetched >= max_pages:
+                    logger.info("Page limit reached for current label combination")
+                    break
+    
+    if len(threads) < num_threads:
+        logger.info("No more label combinations to try")
     
     # Flatten the threads dictionary into a list.
     threads_list = []
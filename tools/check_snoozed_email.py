@@ -16,7 +16,4 @@ def is_email_snoozed(message: dict) -> bool:
     Returns:
         bool: True if the message has the "SNOOZED" label, otherwise False.
     """
-    result={}
-    label_ids = message.get("labelIds", [])
-    result["is_snoozed"] = "SNOOZED" in label_ids
-    return result
\ No newline at end of file
+    return "SNOOZED" in message.get("labelIds", ())
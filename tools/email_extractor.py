@@ -1,7 +1,63 @@
 import base64
+import logging
 import re
+from collections import deque
+from email_reply_parser import EmailReplyParser
 from tools.text_cleaner import clean_text
 
+logger = logging.getLogger(__name__)
+
+# Compiled once at import instead of on every extraction
+_HTML_TAG_RE = re.compile(r'<[^>]+>')
+_SCRIPT_STYLE_RE = re.compile(r'<(script|style)\b[^>]*>.*?</\1\s*>', re.IGNORECASE | re.DOTALL)
+
+
+def _decode_data(data):
+    """
+    Decode a base64url-encoded Gmail body into text.
+    """
+    try:
+        # urlsafe_b64decode accepts the ASCII str directly; no need to encode it first
+        return base64.urlsafe_b64decode(data).decode("utf-8", errors="replace")
+    except Exception as e:
+        logger.error("Error decoding data: %s", e)
+        return ""
+
+def _strip_html(text):
+    """
+    Strip HTML tags, dropping <script> and <style> blocks along with their contents.
+    """
+    return _HTML_TAG_RE.sub('', _SCRIPT_STYLE_RE.sub('', text))
+
+def _find_text(payload):
+    """
+    Walk the MIME tree breadth-first with an explicit queue, looking for text content.
+    Returns a tuple (text, mime_type): the first non-empty "text/plain" part wins;
+    otherwise the first "text/html" part is decoded, only once no plain text was found,
+    and its tags are stripped before cleaning. clean_text removes URLs up to the next
+    whitespace, so on raw HTML it could take closing tags such as </style> with them.
+    """
+    queue = deque([payload])
+    html_data = None
+    while queue:
+        part = queue.popleft()
+        mime_type = part.get("mimeType", "")
+        data = part.get("body", {}).get("data", "")
+        if data:
+            if mime_type == "text/plain":
+                text = clean_text(_decode_data(data))
+                if text:
+                    return text, mime_type
+            elif mime_type == "text/html" and html_data is None:
+                html_data = data
+        queue.extend(part.get("parts", []))
+
+    # Fall back to HTML, or empty strings if no text was found.
+    if html_data is not None:
+        text = clean_text(_strip_html(_decode_data(html_data)))
+        if text:
+            return text, "text/html"
+    return "", ""
 
 def extract_full_content(message, max_chars=1000):
     """
@@ -24,46 +80,8 @@ def extract_full_content(message, max_chars=1000):
     """
     payload = message.get("payload", {})
 
-    def decode_data(data):
-        try:
-            return base64.urlsafe_b64decode(data.encode("ASCII")).decode("utf-8", errors="replace")
-        except Exception as e:
-            print("Error decoding data:", e)
-            return ""
-
-    def recursive_extract(payload):
-        """
-        Recursively search for text content in a payload.
-        Returns a tuple (text, mime_type) where mime_type is the type of the found text.
-        """
-        mime_type = payload.get("mimeType", "")
-        # Check if this payload has direct body data.
-        data = payload.get("body", {}).get("data", "")
-        if data:
-            text = clean_text(decode_data(data))
-            return text, mime_type
-
-        # Otherwise, if there are parts, search each one recursively.
-        for part in payload.get("parts", []):
-            text, part_mime = recursive_extract(part)
-            if text:
-                # Prioritize plain text over HTML.
-                if part_mime == "text/plain":
-                    return text, part_mime
-                # Otherwise, keep HTML as a fallback.
-                elif part_mime == "text/html":
-                    fallback = text, part_mime
-                    # Continue searching in case a plain text part is available.
-                    # If none is found, return the HTML fallback.
-                    continue
-        # If no text was found, return empty strings.
-        return "", ""
-
-    extracted_text, found_mime = recursive_extract(payload)
-    
-    # If the found content is HTML, strip HTML tags.
-    if found_mime == "text/html" and extracted_text:
-        extracted_text = re.sub(r'<[^>]+>', '', extracted_text)
+    # HTML content comes back with its tags already stripped
+    extracted_text, _ = _find_text(payload)
 
     if len(extracted_text) > max_chars:
         extracted_text = extracted_text[:max_chars] + " ... [truncated]"
@@ -93,41 +111,8 @@ def extract_structured_content(message, max_chars=1000):
     """
     payload = message.get("payload", {})
 
-    def decode_data(data):
-        try:
-            return base64.urlsafe_b64decode(data.encode("ASCII")).decode("utf-8", errors="replace")
-        except Exception as e:
-            print("Error decoding data:", e)
-            return ""
-
-    def recursive_extract(payload):
-        """
-        Recursively searches for text content in the payload.
-        Returns a tuple (text, mime_type) where mime_type is the content type.
-        """
-        mime_type = payload.get("mimeType", "")
-        data = payload.get("body", {}).get("data", "")
-        if data:
-            text = clean_text(decode_data(data))
-            return text, mime_type
-        
-        for part in payload.get("parts", []):
-            text, part_mime = recursive_extract(part)
-            if text:
-                # Prioritize plain text over HTML.
-                if part_mime == "text/plain":
-                    return text, part_mime
-                elif part_mime == "text/html":
-                    fallback = text, part_mime
-                    # Continue searching for a plain text version.
-                    continue
-        return "", ""
-
-    extracted_text, found_mime = recursive_extract(payload)
-    
-    # If the content is HTML, strip HTML tags.
-    if found_mime == "text/html" and extracted_text:
-        extracted_text = re.sub(r'<[^>]+>', '', extracted_text)
+    # HTML content comes back with its tags already stripped
+    extracted_text, _ = _find_text(payload)
     
     truncated = False
     if len(extracted_text) > max_chars:
@@ -154,7 +139,7 @@ def extract_structured_content(message, max_chars=1000):
     try:
         reply_text = EmailReplyParser.parse_reply(extracted_text)
     except Exception as e:
-        print("Error parsing reply:", e)
+        logger.exception("Error parsing reply: %s", e)
         reply_text = extracted_text  # Fallback to full content if parsing fails
 
     structured_data = {
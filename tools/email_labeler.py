@@ -6,13 +6,43 @@ based on their categorization and status.
 """
 
 import logging
+import weakref
+
+from googleapiclient.errors import HttpError
 
 
 logger = logging.getLogger(__name__)
 
+# System labels that can be removed by name without an ID lookup
+_SYSTEM_LABELS = frozenset({'INBOX', 'IMPORTANT', 'DRAFT'})
+
+# Label name -> ID map per service instance, so labels are listed once rather than per lookup
+_label_cache = weakref.WeakKeyDictionary()
+
+def _get_label_ids(service):
+    """
+    Return the cached label name -> ID map for a service, listing the labels on first use.
+    """
+    label_ids = _label_cache.get(service)
+    if label_ids is None:
+        labels = service.users().labels().list(userId='me').execute().get('labels', [])
+        label_ids = {label.get('name'): label.get('id') for label in labels}
+        _label_cache[service] = label_ids
+    return label_ids
+
+def invalidate_label_cache(service):
+    """
+    Forget the cached labels for a service, e.g. after labels were changed elsewhere.
+    
+    Args:
+        service: Gmail API service instance
+    """
+    _label_cache.pop(service, None)
+
 def get_or_create_label(service, label_name):
     """
     Gets a label ID by name, or creates it if it doesn't exist.
+    Label IDs are cached per service instance; see invalidate_label_cache.
     
     Args:
         service: Gmail API service instance
@@ -21,13 +51,10 @@ def get_or_create_label(service, label_name):
     Returns:
         The label ID
     """
-    # List all labels for the user
-    labels = service.users().labels().list(userId='me').execute().get('labels', [])
-    
     # Look for an existing label with the given name
-    for label in labels:
-        if label.get('name') == label_name:
-            return label.get('id')
+    label_ids = _get_label_ids(service)
+    if label_name in label_ids:
+        return label_ids[label_name]
     
     # If not found, create the label
     label_body = {
@@ -35,7 +62,20 @@ def get_or_create_label(service, label_name):
         'labelListVisibility': 'labelShow',
         'messageListVisibility': 'show'
     }
-    label = service.users().labels().create(userId='me', body=label_body).execute()
+    try:
+        label = service.users().labels().create(userId='me', body=label_body).execute()
+    except HttpError as error:
+        if error.resp.status != 409:
+            raise
+        # The label may have been created elsewhere since we cached the list; refresh and look again
+        logger.info("Label %s already exists; refreshing label cache", label_name)
+        invalidate_label_cache(service)
+        label_id = _get_label_ids(service).get(label_name)
+        if label_id is None:
+            # The name conflicts with another label (e.g. differing only in case) or a reserved name
+            raise error
+        return label_id
+    label_ids[label_name] = label.get('id')
     return label.get('id')
 
 def apply_label(service, message_id, add_labels=None, remove_labels=None):
@@ -64,7 +104,7 @@ def apply_label(service, message_id, add_labels=None, remove_labels=None):
             # For custom labels, we need to get their IDs
             remove_label_ids = []
             for label in remove_labels:
-                if label.startswith('Q_') or label not in ['INBOX', 'IMPORTANT', 'DRAFT']:
+                if label.startswith('Q_') or label not in _SYSTEM_LABELS:
                     label_id = get_or_create_label(service, label)
                     remove_label_ids.append(label_id)
                 else:
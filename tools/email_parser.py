@@ -11,8 +11,10 @@ License: GPL-3.0
 """
 
 import logging
-from typing import Dict, Any, List
-from tools import extract_headers, extract_message_labels, extract_message_mime_type, extract_full_content, is_email_snoozed
+from typing import Callable, Dict, Any, List, Optional
+from tools.check_email import batch_get_messages
+from tools.extract_metadata import extract_all
+from tools.email_extractor import extract_full_content
 from email_reply_parser import EmailReplyParser
 
 logger = logging.getLogger(__name__)
@@ -25,12 +27,36 @@ class EmailParser:
     def __init__(self, service) -> None:
         self.service = service
 
-    def parse_thread(self, thread: Dict[str, Any]) -> tuple[List[Dict[str, Any]], Dict[str, str]]:
+    def _batch_fetch_messages(self, message_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Fetches full Gmail messages in batch requests, retrying rate-limited and server errors.
+        A message that cannot be fetched is logged and left out, so it does not abort the batch.
+
+        Args:
+            message_ids (list): IDs of the messages to fetch.
+
+        Returns:
+            dict: Full messages keyed by message ID. Messages that failed to fetch are omitted.
+        """
+        errors = {}
+        messages = batch_get_messages(self.service, message_ids, message_format="full", errors=errors)
+        for message_id, error in errors.items():
+            logger.error("Failed to retrieve email message with ID %s: %s", message_id, error)
+        return messages
+
+    def parse_thread(self, thread: Dict[str, Any],
+                     messages: Optional[Dict[str, Dict[str, Any]]] = None,
+                     full_content_sink: Optional[Callable[[str, Dict[str, Any]], None]] = None
+                     ) -> tuple[List[Dict[str, Any]], Dict[str, str]]:
         """
         Parses a single email thread into structured email data.
 
         Args:
             thread (dict): A raw email thread from the Gmail API.
+            messages (dict, optional): Full messages keyed by message ID, as prefetched by
+                parse_emails. The thread's messages are batch-fetched when omitted.
+            full_content_sink (callable, optional): Called with (message_id, entry) for each
+                full content entry. When given, entries are not collected into the returned dict.
 
         Returns:
             tuple: (List of flattened email message dictionaries, Dictionary of full content by message ID)
@@ -39,11 +65,17 @@ class EmailParser:
         thread_id = thread.get("thread_id")
         flattened_messages = []
         full_content_store = {}
+        if full_content_sink is None:
+            full_content_sink = full_content_store.__setitem__
+        if messages is None:
+            messages = self._batch_fetch_messages([msg.get("messageId") for msg in email_messages])
         
         for idx, msg in enumerate(email_messages, start=1):
             try:
                 message_id = msg.get("messageId")
-                message = self.service.users().messages().get(userId='me', id=message_id, format='full').execute()
+                message = messages.get(message_id)
+                if message is None:
+                    continue  # Fetch failed or message no longer exists; already logged
                 
                 # Create base message structure
                 flattened_message = {
@@ -53,17 +85,14 @@ class EmailParser:
                     "message_data": {}
                 }
                 
-                # Add all other data to message_data
-                message_data = msg.copy()
-                headers = extract_headers(message)
-                message_data.update(headers)
-                snoozed = is_email_snoozed(message)
-                # is_promotional = headers.get(message)
-                message_data.update(snoozed)
-                labels = extract_message_labels(message)
-                message_data.update(labels)
-                mime_type = extract_message_mime_type(message)
-                message_data.update(mime_type)
+                # Add all other data to message_data in one literal: the retriever's fields,
+                # then headers, labels and label flags, and MIME type from the full message
+                message_data = {
+                    "messageId": message_id,
+                    "threadId": msg.get("threadId"),
+                    "order": msg.get("order"),
+                    **extract_all(message)
+                }
                 cleaned_content = extract_full_content(message, max_chars=10000)
                 if not cleaned_content.strip():
                     message_data["extraction_error"] = "Empty email content"
@@ -71,14 +100,14 @@ class EmailParser:
                     continue
 
                 # Store full content separately with identifiers
-                full_content_store[message_id] = {
+                full_content_sink(message_id, {
                     "threadId": thread_id,
                     "messageId": message_id,
                     "full_content": cleaned_content
-                }
+                })
 
                 # Parse the email content using EmailReplyParser
-                parsed = EmailReplyParser().parse_reply(cleaned_content)
+                parsed = EmailReplyParser.parse_reply(cleaned_content)
                 message_data['reply'] = parsed
                 # message_data['full_content'] = cleaned_content # Keeping this commented out as requested
                 
@@ -91,32 +120,39 @@ class EmailParser:
         
         return flattened_messages, full_content_store
 
-    def parse_emails(self, threads: List[Dict[str, Any]]) -> tuple[List[Dict[str, Any]], Dict[str, Any]]:
+    def parse_emails(self, threads: List[Dict[str, Any]],
+                     full_content_sink: Optional[Callable[[str, Dict[str, Any]], None]] = None
+                     ) -> tuple[List[Dict[str, Any]], Dict[str, Any]]:
         """
         Parses a list of raw email threads into a flattened list structure.
 
         Args:
             threads (list): List of raw email threads.
+            full_content_sink (callable, optional): Called with (message_id, entry) for each
+                full content entry, e.g. to stream bodies into a store. When given, the returned
+                full content dictionary is empty.
 
         Returns:
             tuple: (A flat list of structured email message entries, Dictionary of full content by message ID)
         """
         flattened_batch = []
         all_full_content = {}
+        if full_content_sink is None:
+            full_content_sink = all_full_content.__setitem__
+        # Fetch every message up front so the whole batch costs a few round trips
+        message_ids = [msg.get("messageId") for thread in threads for msg in thread.get("messages", [])]
+        messages = self._batch_fetch_messages(message_ids)
         for thread in threads:
-            parsed_messages, full_content = self.parse_thread(thread)
+            parsed_messages, _ = self.parse_thread(thread, messages, full_content_sink)
             if parsed_messages:
                 flattened_batch.extend(parsed_messages)
-            all_full_content.update(full_content)
         return flattened_batch, all_full_content
 
 if __name__ == "__main__":
     # This test code assumes you have already set up the Gmail service.
-    from libs.google_oauth import get_gmail_credentials
-    from googleapiclient.discovery import build
+    from libs.google_oauth import get_gmail_service
 
-    creds = get_gmail_credentials()
-    service = build('gmail', 'v1', credentials=creds)
+    service = get_gmail_service()
     parser = EmailParser(service)
     # Example usage with dummy threads list (you would get real threads from EmailRetriever)
     from tools.email_retriever import EmailRetriever
@@ -12,29 +12,33 @@ License: GPL-3.0
 """
 
 import logging
+from collections import OrderedDict
 from typing import List, Dict, Any
-from googleapiclient.discovery import build
-from libs.google_oauth import get_gmail_credentials
+from libs.google_oauth import get_gmail_service
 from tools.check_email import get_last_n_emails
 import time
 
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO)
 
+# Number of full messages kept by retrieve_email_message, least recently used evicted first
+MESSAGE_CACHE_SIZE = 2048
+
 class EmailRetriever:
     """
     Retrieves raw email data from the Gmail API.
     """
     def __init__(self) -> None:
         self.service = None
+        self._message_cache = OrderedDict()  # message ID -> full message, in LRU order
 
     def initialize_service(self) -> None:
         """
-        Initializes the Gmail API service using credentials.
+        Initializes the Gmail API service using the shared process-wide client.
         """
         try:
-            creds = get_gmail_credentials()
-            self.service = build('gmail', 'v1', credentials=creds)
+            self.service = get_gmail_service()
+            self._message_cache.clear()
             logger.info("Gmail service initialized.")
         except Exception as e:
             logger.error("Failed to initialize Gmail service: %s", e)
@@ -58,25 +62,39 @@ class EmailRetriever:
             raise SystemExit("No emails found in INBOX.")
         return threads
 
-    def retrieve_email_message(self, message_id: str) -> Dict[str, Any]:
+    def retrieve_email_message(self, message_id: str, refresh: bool = False) -> Dict[str, Any]:
         """
         Retrieves a specific email message using its message ID.
 
+        Messages are cached per retriever (up to MESSAGE_CACHE_SIZE), so repeat lookups
+        of the same ID skip the API call. Cached messages are not updated when their labels
+        change; pass refresh=True to fetch the current state.
+
         Args:
             message_id (str): The ID of the email message to retrieve.
+            refresh (bool): Bypass the cache and fetch the message again.
 
         Returns:
             Dict[str, Any]: The full email message retrieved from the Gmail API.
         """
+        if not refresh:
+            message = self._message_cache.get(message_id)
+            if message is not None:
+                self._message_cache.move_to_end(message_id)
+                return message
         if self.service is None:
             self.initialize_service()
         try:
             message = self.service.users().messages().get(userId='me', id=message_id, format='full').execute()
             logger.info("Retrieved email message with ID: %s", message_id)
-            return message
         except Exception as e:
             logger.error("Failed to retrieve email message with ID %s: %s", message_id, e)
             raise
+        self._message_cache[message_id] = message
+        self._message_cache.move_to_end(message_id)
+        if len(self._message_cache) > MESSAGE_CACHE_SIZE:
+            self._message_cache.popitem(last=False)
+        return message
 
 if __name__ == "__main__":
     retriever = EmailRetriever()
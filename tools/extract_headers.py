@@ -1,8 +1,13 @@
 import email.utils
-from datetime import datetime
-import pytz
+from zoneinfo import ZoneInfo
 from tools.text_cleaner import clean_text
 
+# Looked up once at import rather than on every message
+EASTERN = ZoneInfo("America/New_York")
+
+# Header fields copied into the result. Date is handled separately.
+VALID_KEYS = frozenset({"subject", "from", "to", "cc", "bcc", "reply-to"})
+
 def extract_headers(message: dict) -> dict:
     """
     Extract header fields from a Gmail message and return them in a dictionary.
@@ -28,26 +33,26 @@ def extract_headers(message: dict) -> dict:
     headers = payload.get("headers", [])
     
     date_str = ""
-    valid_keys = {"subject",
-                  "from",
-                  "to",
-                  "cc",
-                  "bcc",
-                  "reply-to"}  # valid keys
-    # do NOT include labelIds or date. They require special processing.
+    # do NOT include labelIds or date in VALID_KEYS. They require special processing.
+    remaining = set(VALID_KEYS) | {"date"}
 
     result = {}
     for header in headers:
         key = header.get("name", "").lower()
-        if key in valid_keys:
-            result[key] = clean_text(header.get("value", ""))
+        if key in VALID_KEYS:
+            value = header.get("value", "")
+            result[key] = clean_text(value) if value else ""
         elif key == "date":
             raw_date = header.get("value", "")
             dt = email.utils.parsedate_to_datetime(raw_date)
-            eastern = pytz.timezone("US/Eastern")
-            dt_est = dt.astimezone(eastern)
-            dt_naive = dt_est.replace(tzinfo=None)  # Remove tzinfo
-            date_str = dt_naive.strftime("%Y-%m-%d %H:%M:%S")
+            dt_naive = dt.astimezone(EASTERN).replace(tzinfo=None)  # Remove tzinfo
+            date_str = dt_naive.isoformat(sep=" ", timespec="seconds")
             result[key] = date_str
+        else:
+            continue
+        # Stop scanning once every field we want has been seen.
+        remaining.discard(key)
+        if not remaining:
+            break
     
     return result # update message_data in main script with this
\ No newline at end of file
@@ -3,16 +3,26 @@
 Module for extracting label IDs from a Gmail message.
 """
 
+# Label sets checked against every message, built once at import
+_SNOOZE_LABELS = frozenset({"SNOOZED"})
+_PROMOTION_LABELS = frozenset({"CATEGORY_PROMOTIONS"})
+
 def extract_message_labels(message: dict) -> dict:
     """
-    Extract label IDs from the given Gmail message.
+    Extract label IDs from the given Gmail message, along with the flags derived from them.
 
     Args:
         message (dict): A dictionary representing a Gmail message.
 
     Returns:
-        dict: A dictionary containing the label IDs under the key "labelIds".
+        dict: A dictionary containing:
+              - labelIds: List of Gmail label IDs
+              - is_snoozed: True if the message has the "SNOOZED" label
+              - is_promotional: True if the message has the "CATEGORY_PROMOTIONS" label
     """
-    result = {}
-    result["labelIds"] = message.get("labelIds", [])
-    return result
\ No newline at end of file
+    label_ids = message.get("labelIds", [])
+    return {
+        "labelIds": label_ids,
+        "is_snoozed": not _SNOOZE_LABELS.isdisjoint(label_ids),
+        "is_promotional": not _PROMOTION_LABELS.isdisjoint(label_ids)
+    }
@@ -0,0 +1,28 @@
+#!/usr/bin/env python3
+"""
+Module for extracting all message metadata from a Gmail message in one call.
+"""
+
+from tools.extract_headers import extract_headers
+from tools.extract_label_ids import extract_message_labels
+from tools.extract_mimetype import extract_message_mime_type
+
+def extract_all(message: dict) -> dict:
+    """
+    Extract headers, label IDs and label flags, and MIME type from the given Gmail message.
+
+    Equivalent to merging the results of extract_headers, extract_message_labels,
+    and extract_message_mime_type into one dictionary.
+
+    Args:
+        message (dict): A dictionary representing a Gmail message.
+
+    Returns:
+        dict: The header fields from extract_headers, the label fields from
+              extract_message_labels ("labelIds", "is_snoozed", "is_promotional"),
+              and "mimeType".
+    """
+    result = extract_headers(message)
+    result.update(extract_message_labels(message))
+    result.update(extract_message_mime_type(message))
+    return result
@@ -15,6 +15,54 @@ import pprint
 # Configure logging
 logger = logging.getLogger(__name__)
 
+# Default yes/no question for each AI decision
+_DECISION_PROMPTS = {
+    "respond": "I think we should respond.",
+    "no response needed": "This email does not need a response.",
+    "decline": "I think we should politely decline.",
+    "move forward": "I think we should draft a response.",
+    "schedule meeting": "I think we should setup a meeting.",
+    "other email": "Placeholder for binary questions here.", # TODO: Add binary questions here.
+}
+
+def _prompt_for_decision(decision):
+    """
+    Build the default yes/no question for an AI decision.
+
+    Raises:
+        ValueError: If the decision is not one we know how to ask about.
+    """
+    try:
+        return _DECISION_PROMPTS[decision]
+    except (KeyError, TypeError):
+        raise ValueError(f"Invalid needs_response decision: {decision}") from None
+
+def _format_context(context):
+    """
+    Format context for display, one line per key when given a dictionary.
+    List values are shown one indented item per line.
+    """
+    if not isinstance(context, dict):
+        return str(context)
+    lines = []
+    for key, value in context.items():
+        if isinstance(value, list):
+            lines.append(f"{key}:")
+            lines.extend(f"    {item}" for item in value)
+        else:
+            lines.append(f"{key}: {value}")
+    return "\n".join(lines)
+
+def _log_feedback(decision, is_correct):
+    """
+    Log whether the human confirmed or overrode an AI decision.
+    """
+    if decision:
+        if is_correct:
+            logger.info("Human confirmed AI decision: %s", decision)
+        else:
+            logger.info("Human overrode AI decision: %s", decision)
+
 def get_yes_no_feedback(prompt=None, decision=None, context=None):
     """
     Get yes/no feedback from a human user.
@@ -27,36 +75,14 @@ def get_yes_no_feedback(prompt=None, decision=None, context=None):
     Returns:
         tuple: (is_correct, human_input) where:
             - is_correct (bool): True if the human agrees with the AI decision, False otherwise.
-            - human_input (str): The raw input from the human ('y' or 'n').
+            - human_input (str): The raw input from the human ('correct' or 'wrong').
     """
     if prompt is None:
-        if decision == "respond":
-                prompt = "I think we should respond."
-        elif decision == "no response needed":
-            prompt = "This email does not need a response."
-        elif decision == "decline":
-            prompt = "I think we should politely decline."
-        elif decision == "move forward":
-            prompt = "I think we should draft a response."
-        elif decision == "schedule meeting":
-            prompt = "I think we should setup a meeting."
-        elif decision == "other email":
-            prompt = "Placeholder for binary questions here." # TODO: Add binary questions here.
-        else:
-            raise ValueError(f"Invalid needs_response decision: {decision}")
-    
+        prompt = _prompt_for_decision(decision)
 
     # Display context if provided
     if context:
-        if isinstance(context, dict):
-            for key, value in context.items():
-                if isinstance(value, list):
-                    print(f"{key}:")
-                    [print('    \n',i) for i in value]
-                else:
-                    print(f"{key}: {value}")
-        else:
-            print(context)
+        print(_format_context(context))
     
     # Get human input
     while True:
@@ -67,14 +93,54 @@ def get_yes_no_feedback(prompt=None, decision=None, context=None):
     
     # Log the feedback
     is_correct = human_input == 'correct'
-    if decision:
-        if is_correct:
-            logger.info(f"Human confirmed AI decision: {decision}")
-        else:
-            logger.info(f"Human overrode AI decision: {decision}")
+    _log_feedback(decision, is_correct)
     
     return is_correct, human_input
 
+def get_yes_no_feedback_bulk(items):
+    """
+    Get yes/no feedback on several AI decisions with a single prompt.
+
+    All questions are shown as a numbered list and the user answers them in one line,
+    e.g. "correct wrong c w" ('c' and 'w' are accepted as shorthand).
+
+    Args:
+        items (list): (prompt, decision, context) tuples, with the same meaning as the
+            arguments of get_yes_no_feedback. prompt and context may be None.
+
+    Returns:
+        list: One (is_correct, human_input) tuple per item, in order, where human_input
+            is 'correct' or 'wrong'.
+    """
+    if not items:
+        return []
+
+    prompts = []
+    for prompt, decision, context in items:
+        prompts.append(prompt if prompt is not None else _prompt_for_decision(decision))
+
+    # Display each question with its context
+    for i, ((_, _, context), prompt) in enumerate(zip(items, prompts), 1):
+        print(f"\n{i}. {prompt}")
+        if context:
+            print(_format_context(context))
+
+    # Get human input, one answer per question
+    answer_map = {'correct': 'correct', 'c': 'correct', 'wrong': 'wrong', 'w': 'wrong'}
+    while True:
+        answers = input(f"\n\nHUMAN FEEDBACK REQUESTED:\nReply with {len(items)} answers, 'correct' or 'wrong', separated by spaces: ").lower().split()
+        if len(answers) == len(items) and all(answer in answer_map for answer in answers):
+            break
+        print(f"Please enter exactly {len(items)} answers, each 'correct' or 'wrong'.")
+
+    results = []
+    for (_, decision, _), answer in zip(items, answers):
+        human_input = answer_map[answer]
+        is_correct = human_input == 'correct'
+        _log_feedback(decision, is_correct)
+        results.append((is_correct, human_input))
+    return results
+
 def get_feedback_with_options(prompt, options, context=None):
     """
     Get feedback from a human user with multiple options.
@@ -103,7 +169,7 @@ def get_feedback_with_options(prompt, options, context=None):
             selection_idx = int(selection) - 1
             if 0 <= selection_idx < len(options):
                 selected_option = options[selection_idx]
-                logger.info(f"Human selected option: {selected_option}")
+                logger.info("Human selected option: %s", selected_option)
                 return selected_option
             else:
                 print(f"Please enter a number between 1 and {len(options)}.")
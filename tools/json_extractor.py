@@ -18,9 +18,10 @@ def extract_json_from_model_output(model_result):
     Returns:
         str: Extracted JSON string
     """
-    # Check if output follows "Expected Output:" format
-    if "Expected Output:" in model_result:
-        json_str = model_result.split("Expected Output:", 1)[1].strip()
+    # Check if output follows "Expected Output:" format; partition finds and splits in one scan
+    _, sentinel, after_sentinel = model_result.partition("Expected Output:")
+    if sentinel:
+        json_str = after_sentinel.strip()
     else:
         # Find JSON in the output using braces
         json_start = model_result.find('{')
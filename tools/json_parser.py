@@ -17,6 +17,31 @@ import logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Trailing commas before a closing brace or bracket, a common LLM formatting slip
+_TRAILING_COMMA_RE = re.compile(r',\s*([}\]])')
+
+# Keyword fallbacks, checked in order: (substrings that must all appear, result)
+_KEYWORD_RESULTS = (
+    (("respond",), {"needs_response": "respond"}),
+    (("no response needed",), {"needs_response": "no response needed"}),
+    (("yes", "meeting"), {"is_meeting_request": "yes"}),
+    (("no", "meeting"), {"is_meeting_request": "no"}),
+    (("decline",), {"category": "decline"}),
+)
+
+def _load_braced_json(text):
+    """
+    Parse the outermost {...} span of text, or return None if there is none.
+    Raises json.JSONDecodeError if the span is not valid JSON.
+    """
+    json_start = text.find('{')
+    json_end = text.rfind('}') + 1
+    if json_start >= 0 and json_end > json_start:
+        # Handle common formatting issues
+        json_str = _TRAILING_COMMA_RE.sub(r'\1', text[json_start:json_end])
+        return json.loads(json_str)
+    return None
+
 def parse_json_output(output_text, default_value=None):
     """
     Parse JSON output from LLM response.
@@ -30,56 +55,38 @@ def parse_json_output(output_text, default_value=None):
     """
     try:
         # Check for the specific pattern we're seeing in the output
-        if "Output:" in output_text:
-            # Extract the text after "Output:"
-            output_section = output_text.split("Output:", 1)[1].strip()
-            # Now try to find JSON in this section
-            json_start = output_section.find('{')
-            json_end = output_section.rfind('}') + 1
-            
-            if json_start >= 0 and json_end > json_start:
-                json_str = output_section[json_start:json_end]
-                # Handle common formatting issues
-                json_str = re.sub(r',\s*}', '}', json_str)
-                json_str = re.sub(r',\s*]', ']', json_str)
-                return json.loads(json_str)
+        _, sentinel, output_section = output_text.partition("Output:")
+        if sentinel:
+            # Now try to find JSON in the text after "Output:"
+            parsed = _load_braced_json(output_section)
+            if parsed is not None:
+                return parsed
         
         # If that didn't work, try the original approach
-        json_start = output_text.find('{')
-        json_end = output_text.rfind('}') + 1
-        
-        if json_start >= 0 and json_end > json_start:
-            json_str = output_text[json_start:json_end]
-            # Handle common formatting issues
-            json_str = re.sub(r',\s*}', '}', json_str)
-            json_str = re.sub(r',\s*]', ']', json_str)
-            return json.loads(json_str)
+        parsed = _load_braced_json(output_text)
+        if parsed is not None:
+            return parsed
         
         # Check for specific keywords in the text
-        if "respond" in output_text.lower():
-            return {"needs_response": "respond"}
-        elif "no response needed" in output_text.lower():
-            return {"needs_response": "no response needed"}
-        elif "yes" in output_text.lower() and "meeting" in output_text.lower():
-            return {"is_meeting_request": "yes"}
-        elif "no" in output_text.lower() and "meeting" in output_text.lower():
-            return {"is_meeting_request": "no"}
-        elif "decline" in output_text.lower():
-            return {"category": "decline"}
+        lowered = output_text.lower()
+        for needles, result in _KEYWORD_RESULTS:
+            if all(needle in lowered for needle in needles):
+                return dict(result)
         
         # If we get here, we couldn't parse the output
-        logger.warning(f"Failed to parse JSON from: {output_text}")
+        logger.warning("Failed to parse JSON from: %s", output_text)
         return default_value
     except json.JSONDecodeError as e:
         # If we get a JSON decode error, try to extract just the value
-        if "needs_response" in output_text.lower():
-            if "respond" in output_text.lower():
+        lowered = output_text.lower()
+        if "needs_response" in lowered:
+            if "respond" in lowered:
                 return {"needs_response": "respond"}
             else:
                 return {"needs_response": "no response needed"}
         
-        logger.warning(f"JSON decode error: {e} in text: {output_text}")
+        logger.warning("JSON decode error: %s in text: %s", e, output_text)
         return default_value
     except Exception as e:
-        logger.warning(f"Error parsing JSON: {e} from: {output_text}")
-        return default_value 
\ No newline at end of file
+        logger.warning("Error parsing JSON: %s from: %s", e, output_text)
+        return default_value
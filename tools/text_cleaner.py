@@ -6,6 +6,29 @@ import re
 import unicodedata
 import html
 
+# Patterns compiled once at import; clean_text runs on every header value and body.
+# Image tags must be removed before URLs: a URL running into a tag, as in
+# "https://a.com[https://a.com/logo.png Company]", would otherwise swallow the
+# start of the tag and leave "Company]" behind.
+_IMAGE_TAG_RE = re.compile(r'\[https?://[^\]]+\]')
+_URL_RE = re.compile(r'https?://\S+')
+_WHITESPACE_RE = re.compile(r'[ \t]+')
+
+class _ControlCharTable(dict):
+    """
+    str.translate table that deletes control and format characters (Unicode category C),
+    except newline, tab, and space. Each code point is classified once, on first sight,
+    so later lookups stay in C. The invisible characters (zero-width spaces and joiners,
+    BOM) are category Cf and are removed here too.
+    """
+    def __missing__(self, code_point):
+        char = chr(code_point)
+        value = None if unicodedata.category(char)[0] == 'C' and char not in '\n\t ' else code_point
+        self[code_point] = value
+        return value
+
+_CONTROL_CHAR_TABLE = _ControlCharTable()
+
 def clean_text(text: str) -> str:
     """
     Clean the given text by:
@@ -28,22 +51,18 @@ def clean_text(text: str) -> str:
     # Unescape HTML entities.
     text = html.unescape(text)
     
-    # Remove invisible characters.
-    text = re.sub(r'[\u200b\u200c\u200d\ufeff]', '', text)
-    
-    # Remove control characters (except newline, tab, and space).
-    text = ''.join(ch for ch in text if unicodedata.category(ch)[0] != 'C' or ch in '\n\t ')
-    
-    # Remove image tags of the form [https://...]
-    text = re.sub(r'\[https?://[^\]]+\]', '', text)
+    # Remove invisible and control characters (except newline, tab, and space).
+    text = text.translate(_CONTROL_CHAR_TABLE)
     
-    # Remove standalone URLs (starting with http:// or https://).
-    text = re.sub(r'https?://\S+', '', text)
+    # Remove image tags of the form [https://...] and standalone URLs
+    # (starting with http:// or https://).
+    text = _IMAGE_TAG_RE.sub('', text)
+    text = _URL_RE.sub('', text)
     
     # Collapse multiple whitespace characters into a single space and strip.
-    lines = text.splitlines()
-    cleaned_lines = [re.sub(r'[ \t]+', ' ', line).strip() for line in lines]
-    cleaned_text = "\n".join(cleaned_lines).strip()
+    # [ \t]+ never spans a line break, so one pass over the whole text suffices.
+    lines = _WHITESPACE_RE.sub(' ', text).splitlines()
+    cleaned_text = "\n".join(line.strip() for line in lines).strip()
     
     return cleaned_text
 